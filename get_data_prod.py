@@ -1,32 +1,34 @@
 import os
 import logging
 import argparse
-import numpy as np
 import pandas as pd
 from datetime import datetime
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
+from lxml import html as lxml_html
 
 # Configure logging for better traceability
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def user_tag_extract(tag):
-    """
-    Function to check if a tag is an anchor (<a>) with a 'target' attribute.
-    """
-    return tag.name == 'a' and tag.has_attr('target')
+# Parser that decodes raw UTF-8 bytes and skips comment and processing-instruction nodes, which are never needed
+USER_LINK_PARSER = lxml_html.HTMLParser(encoding='utf-8', remove_comments=True, remove_pis=True)
+
+# Text of every anchor (<a>) with a 'target' attribute, compiled once at import.
+# Plain strings are returned so results do not keep a reference back into the parsed tree.
+USER_LINK_XPATH = etree.XPath('//a[@target]/text()[1]', smart_strings=False)
 
 def read_file(file_path):
     """
-    Reads the contents of the file at the given file path.
+    Reads the raw bytes of the file at the given file path. Decoding is left to the HTML parser.
 
     Args:
         file_path (str): Path to the HTML file to read.
 
     Returns:
-        str: File content as a string, or None if the file could not be read.
+        bytes: File content as bytes, or None if the file could not be read.
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
+        with open(file_path, 'rb') as file:
             return file.read()
     except FileNotFoundError:
         logging.error(f"File '{file_path}' not found.")
@@ -39,7 +41,7 @@ def extract_user_links(html_content):
     Extracts content of all <a> tags with a 'target' attribute from the given HTML content.
 
     Args:
-        html_content (str): HTML content to parse.
+        html_content (bytes): UTF-8 encoded HTML content to parse.
 
     Returns:
         list: A list of the contents of <a> tags with 'target' attribute, or empty list if none found.
@@ -49,21 +51,37 @@ def extract_user_links(html_content):
         return []
 
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        elem = [e.contents[0] for e in soup.find_all(user_tag_extract)]
-        return elem
+        # lxml serialises parses that share a parser object, so use a copy per call
+        tree = lxml_html.fromstring(html_content, parser=USER_LINK_PARSER.copy())
+        return USER_LINK_XPATH(tree)
     except Exception as e:
         logging.error(f"Error parsing HTML content: {e}")
         return []
 
+def read_and_extract_user_links(file_path):
+    """
+    Reads the HTML file at the given file path and extracts its user links.
+
+    Args:
+        file_path (str): Path to the HTML file to read.
+
+    Returns:
+        list: A list of the contents of <a> tags with 'target' attribute, or None if the file could not be read or is empty.
+    """
+    html_content = read_file(file_path)
+    if not html_content:
+        return None
+    return extract_user_links(html_content)
+
 def update_csv_with_new_data(file_path, new_data_df, existing_df=None, unique_column='following_them_only'):
     """
-    Updates a CSV file with new rows that do not already exist, based on a unique identifier column.
+    Appends to a CSV file the new rows that do not already exist, based on a unique identifier column.
+    Only the new rows are written; the header is written when the file does not exist yet.
     
     Args:
         file_path (str): Path to the CSV file.
         new_data_df (pandas.DataFrame): DataFrame containing new data to add.
-        existing_df (pandas.DataFrame, optional): Existing DataFrame if reading from an existing file. Default is None.
+        existing_df (pandas.DataFrame, optional): Existing data used for duplicate checks; only the unique column is needed. Default is None.
         unique_column (str): The column used to check for duplicates (default is 'following_me_only'). 
     """
     if existing_df is None:
@@ -81,10 +99,10 @@ def update_csv_with_new_data(file_path, new_data_df, existing_df=None, unique_co
     # Identify rows that are not already in the existing DataFrame based on the unique column
     new_rows = new_data_df[~new_data_df[unique_column].isin(existing_df[unique_column])]
     
-    # Append the new rows to the existing DataFrame
+    # Append only the new rows to the file instead of rewriting it
     if not new_rows.empty:
-        updated_df = pd.concat([existing_df, new_rows], ignore_index=True)
-        updated_df.to_csv(file_path, index=False)
+        write_header = not os.path.exists(file_path)
+        new_rows.to_csv(file_path, mode='a', header=write_header, index=False)
         print(f"File updated: {file_path}")
     else:
         print(f"No new data to update in: {file_path}")
@@ -102,23 +120,25 @@ def main():
     following_html_path = args.following_list
     followers_html_path = args.followers_list
     
-    # Read file content
-    logging.info(f"Reading files \n'{followers_html_path}' and '{following_html_path}'...")
-    html_content_followers = read_file(followers_html_path)
-    html_content_following = read_file(following_html_path)
-
-    if html_content_followers and html_content_following:
-        # Extract links with a 'target' attribute
-        logging.info("Extracting user links...")
-        extracted_data_following = extract_user_links(html_content_following)
-        extracted_data_followers = extract_user_links(html_content_followers)
-
+    # Read both files and extract links with a 'target' attribute concurrently;
+    # file I/O and lxml parsing release the GIL, so the two files overlap
+    logging.info(f"Reading files and extracting user links \n'{followers_html_path}' and '{following_html_path}'...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        followers_future = executor.submit(read_and_extract_user_links, followers_html_path)
+        following_future = executor.submit(read_and_extract_user_links, following_html_path)
+        extracted_data_followers = followers_future.result()
+        extracted_data_following = following_future.result()
+
+    if extracted_data_followers is not None and extracted_data_following is not None:
         if extracted_data_followers and extracted_data_following:
             logging.info(f"Extracted {len(extracted_data_followers)} users from followers and {len(extracted_data_following)} users from following.")
             
             # Compute the difference between following and followers
-            following_only = np.setdiff1d(extracted_data_following, extracted_data_followers)
-            followers_only = np.setdiff1d(extracted_data_followers, extracted_data_following)
+            # Hash each list once and scan the other's unique users, keeping the original order
+            followers_set = set(extracted_data_followers)
+            following_set = set(extracted_data_following)
+            following_only = [user for user in dict.fromkeys(extracted_data_following) if user not in followers_set]
+            followers_only = [user for user in dict.fromkeys(extracted_data_followers) if user not in following_set]
             
             # Log the differences
             logging.info(f"Users in 'following' but not 'followers': {len(following_only)}")
@@ -138,15 +158,17 @@ def main():
             follower_only_path = os.path.join(os.getcwd(), 'follower_only.csv')
             following_only_path = os.path.join(os.getcwd(), 'following_only.csv')
             
-            # Read existing CSV files for comparison, if they exist
+            # Read the unique column of existing CSV files for comparison, if they exist;
+            # a file without that column yields an empty frame and is reported when updating
+            # Usernames are read as plain strings so numeric or 'NA'-like names are not converted
             if os.path.exists(following_only_path):
-                existing_following_df = pd.read_csv(following_only_path)
+                existing_following_df = pd.read_csv(following_only_path, usecols=lambda column: column == 'following_them_only', dtype=str, keep_default_na=False)
             else:
                 # ensure correct structure
                 existing_following_df = pd.DataFrame(columns=['following_them_only', 'date_added'])
 
             if os.path.exists(follower_only_path):
-                existing_follower_df = pd.read_csv(follower_only_path)
+                existing_follower_df = pd.read_csv(follower_only_path, usecols=lambda column: column == 'following_me_only', dtype=str, keep_default_na=False)
             else:
                 # ensure correct structure
                 existing_follower_df = pd.DataFrame(columns=['following_me_only', 'date_added'])
@@ -156,9 +178,9 @@ def main():
             update_csv_with_new_data(follower_only_path, follower_only_df, existing_df=existing_follower_df, unique_column='following_me_only')
             
             # Print the differences
-            if following_only.size > 0:
+            if following_only:
                 logging.info(f"Following-only users: {following_only}")
-            if followers_only.size > 0:
+            if followers_only:
                 logging.info(f"Followers-only users: {followers_only}")
         else:
             logging.info("No user links found.")